@@ -1,24 +1,34 @@
 """莆田水费集成."""
 from __future__ import annotations
 
+import asyncio
 import logging
 import aiohttp
 import json
+import re
 import urllib.parse
-from datetime import datetime
+from datetime import date
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import ATTR_COUNT, BILL_LOOKBACK_MONTHS, DOMAIN, SERVICE_PROFILE
+from .profiling import StageTimer, profile_context
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_COUNT, default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+})
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """设置配置条目."""
@@ -26,40 +36,68 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     # 创建 API 实例
     session = async_get_clientsession(hass)
+    timer = StageTimer()
     hass.data[DOMAIN][entry.entry_id] = {
         "api": PutianWaterAPI(
             session=session,
             token=entry.data["token"],
             cookie=entry.data["cookie"],
             meter_number=entry.data["meter_number"],
-            query_year=entry.data["query_year"],
             water_corp_id=entry.data.get("water_corp_id", 3),
-            area_id=entry.data.get("area_id", 0)
-        )
+            area_id=entry.data.get("area_id", 0),
+            timer=timer
+        ),
+        "timer": timer,
     }
 
     # 设置传感器平台
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # 注册性能分析服务（所有条目共用）
+    if not hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        hass.services.async_register(
+            DOMAIN, SERVICE_PROFILE, _async_handle_profile, schema=PROFILE_SCHEMA
+        )
     return True
 
 
+async def _async_handle_profile(call: ServiceCall) -> None:
+    """对接下来的 N 次刷新进行性能分析，并立即触发一次刷新."""
+    count = call.data[ATTR_COUNT]
+    coordinators = [
+        entry_data["coordinator"]
+        for entry_data in call.hass.data.get(DOMAIN, {}).values()
+        if "coordinator" in entry_data
+    ]
+    for coordinator in coordinators:
+        coordinator.arm_profile(count)
+    for coordinator in coordinators:
+        await coordinator.async_refresh()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """卸载配置条目."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
     return unload_ok
 
 
 class PutianWaterAPI:
     """莆田水费 API 客户端."""
     
-    def __init__(self, session, token, cookie, meter_number, query_year, water_corp_id=3, area_id=0):
+    def __init__(self, session, token, cookie, meter_number, water_corp_id=3, area_id=0, timer=None):
         """初始化 API 客户端."""
         self._session = session
+        self._timer = timer or StageTimer()
+        # 由协调器在性能分析期间设置
+        self.profile_session = None
         self._token = token
         self._cookie = cookie
         self._meter_number = meter_number
-        self._query_year = query_year
+        # 已结束年份的账单缓存，键为年份
+        self._closed_year_bills: dict[int, list] = {}
         # 确保water_corp_id和area_id是整数
         self._water_corp_id = int(water_corp_id) if water_corp_id else 3
         self._area_id = int(area_id) if area_id else 0
@@ -123,7 +161,9 @@ class PutianWaterAPI:
                     raise Exception(f"Unexpected content type: {content_type}")
                 
                 # 解析JSON响应
-                result = await response.json()
+                text = await response.text()
+                with self._timer.time("json_decode"), profile_context(self.profile_session, "json_decode"):
+                    result = json.loads(text)
                 _LOGGER.debug("Response received: %s", result)
                 
                 # 检查API响应状态 - 修复：服务器返回成功消息但success字段可能为false
@@ -161,17 +201,33 @@ class PutianWaterAPI:
         
         return await self._make_request("queryUserMeterList/v1.json", request_body)
     
-    async def get_payment_info(self):
-        """获取缴费信息."""
-        # 使用配置的年份生成日期范围
-        year = self._query_year
-        start_date = f"{year}0101"  # 如：20250101
-        end_date = f"{year}1231"   # 如：20251231
-        
+    @staticmethod
+    def get_query_years(today: date | None = None) -> list[int]:
+        """根据当前日期获取需要查询的年份（从新到旧）."""
+        today = today or dt_util.now().date()
+        # 查询窗口：往前回溯 BILL_LOOKBACK_MONTHS 个月至今天
+        months = today.year * 12 + today.month - 1 - BILL_LOOKBACK_MONTHS
+        start_year = months // 12
+        return list(range(today.year, start_year - 1, -1))
+
+    @staticmethod
+    def _is_bills_settled(year: int, bills: list, today: date) -> bool:
+        """判断往年账单是否已完整且均已缴费（12月账单可能到次年才出）."""
+        if year >= today.year or not bills:
+            return False
+        has_december = any(
+            (match := re.match(r"\d{4}\D?(\d{1,2})", str(bill.get("costDate", ""))))
+            and int(match.group(1)) == 12
+            for bill in bills
+        )
+        return has_december and all(bill.get("paymentDate") for bill in bills)
+
+    async def _get_year_payment_info(self, year: int) -> list:
+        """获取指定年份的缴费信息."""
         request_body = {
             "meterNumber": self._meter_number,
-            "startDate": start_date,
-            "endDate": end_date,
+            "startDate": f"{year}0101",  # 如：20250101
+            "endDate": f"{year}1231",   # 如：20251231
             "waterCorpId": self._water_corp_id,  # 现在确保是整数
             "payStatus": "2",
             "token": self._token,
@@ -181,9 +237,44 @@ class PutianWaterAPI:
             "apiType": "PC",
             "appVersion": "1.0.2"
         }
-        
-        return await self._make_request("queryPayMentInfo/v2.json", request_body)
-    
+
+        result = await self._make_request("queryPayMentInfo/v2.json", request_body)
+        data = result.get("data")
+        return data if isinstance(data, list) else []
+
+    async def get_payment_info(self):
+        """获取缴费信息，跨年时按年份并行查询并合并."""
+        today = dt_util.now().date()
+        years = self.get_query_years(today)
+        pending = [year for year in years if year not in self._closed_year_bills]
+        fetched: dict[int, list] = {}
+
+        if pending:
+            _LOGGER.debug("Querying payment info for years: %s", pending)
+            results = await asyncio.gather(
+                *(self._get_year_payment_info(year) for year in pending),
+                return_exceptions=True
+            )
+            for year, bills in zip(pending, results):
+                if isinstance(bills, BaseException):
+                    # 仅当年查询失败时整体失败，往年失败则跳过且不缓存
+                    if year == today.year:
+                        raise bills
+                    _LOGGER.warning("Failed to query payment info for %s: %s", year, bills)
+                    continue
+                # 仅缓存12月账单已出且均已缴费的往年
+                if self._is_bills_settled(year, bills, today):
+                    self._closed_year_bills[year] = bills
+                else:
+                    fetched[year] = bills
+
+        # 合并结果，新年份在前，年份内保持接口返回的顺序
+        merged = []
+        for year in years:
+            merged.extend(self._closed_year_bills.get(year, fetched.get(year, [])))
+
+        return {"success": True, "data": merged, "years": years}
+
     async def test_connection(self):
         """测试连接."""
         try:
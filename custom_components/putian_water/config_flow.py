@@ -27,14 +27,6 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             try:
-                # 验证年份格式
-                try:
-                    year = int(user_input["query_year"])
-                    if year < 2000 or year > 2100:
-                        errors["query_year"] = "year_range_error"
-                except ValueError:
-                    errors["query_year"] = "invalid_year"
-                
                 # 验证水表号
                 if not user_input["meter_number"].strip():
                     errors["meter_number"] = "meter_number_required"
@@ -59,7 +51,6 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         token=user_input["token"],
                         cookie=user_input["cookie"],
                         meter_number=user_input["meter_number"],
-                        query_year=user_input["query_year"],
                         water_corp_id=int(user_input.get("water_corp_id", 3)),
                         area_id=int(user_input.get("area_id", 0))
                     )
@@ -109,9 +100,6 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required("cookie"): selector.TextSelector(
                     selector.TextSelectorConfig(type=selector.TextSelectorType.TEXT)
                 ),
-                vol.Required("query_year", default="2025"): selector.TextSelector(
-                    selector.TextSelectorConfig(type=selector.TextSelectorType.TEXT)
-                ),
                 vol.Optional("water_corp_id", default=3): selector.NumberSelector(
                     selector.NumberSelectorConfig(min=1, max=100, step=1, mode=selector.NumberSelectorMode.BOX)
                 ),
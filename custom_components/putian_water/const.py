@@ -1,2 +1,9 @@
 """莆田水费集成常量."""
-DOMAIN = "putian_water"
\ No newline at end of file
+DOMAIN = "putian_water"
+
+# 账单查询窗口：从当前日期往前回溯的月数（覆盖次年1-2月才出的上年末账单）
+BILL_LOOKBACK_MONTHS = 2
+
+# 服务
+SERVICE_PROFILE = "profile"
+ATTR_COUNT = "count"
@@ -0,0 +1,37 @@
+"""莆田水费诊断信息."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {"token", "cookie", "meter_number"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """返回配置条目的诊断信息."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = entry_data.get("coordinator")
+
+    diagnostics = {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "stage_timings": entry_data["timer"].as_dict(),
+    }
+
+    if coordinator is not None:
+        data = coordinator.data or {}
+        diagnostics["coordinator"] = {
+            "last_update_success": coordinator.last_update_success,
+            "last_update": data["last_update"].isoformat() if data.get("last_update") else None,
+            "query_year": data.get("query_year"),
+            "error": data.get("error"),
+            "last_profile_report": coordinator.last_profile_report,
+        }
+
+    return diagnostics
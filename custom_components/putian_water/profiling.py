@@ -0,0 +1,172 @@
+"""莆田水费性能统计与分析."""
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# 报告中输出的函数与内存分配条目数
+PROFILE_TOP_FUNCTIONS = 50
+PROFILE_TOP_ALLOCATIONS = 25
+
+# 同一时间只允许一个分析会话（cProfile 与 tracemalloc 均为进程级）
+_active_session: ProfileSession | None = None
+
+
+class StageTimer:
+    """记录协调器各阶段耗时（常驻、开销很小）."""
+
+    def __init__(self):
+        """初始化计时器."""
+        self._stages: dict[str, dict[str, Any]] = {}
+
+    @contextmanager
+    def time(self, stage: str):
+        """统计代码块耗时."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        """记录一次阶段耗时."""
+        stats = self._stages.setdefault(
+            stage, {"count": 0, "last": 0.0, "max": 0.0, "total": 0.0}
+        )
+        stats["count"] += 1
+        stats["last"] = seconds
+        stats["max"] = max(stats["max"], seconds)
+        stats["total"] += seconds
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """返回各阶段耗时（毫秒）."""
+        return {
+            stage: {
+                "count": stats["count"],
+                "last_ms": round(stats["last"] * 1000, 3),
+                "max_ms": round(stats["max"] * 1000, 3),
+                "avg_ms": round(stats["total"] * 1000 / stats["count"], 3),
+            }
+            for stage, stats in self._stages.items()
+        }
+
+
+class ProfileSession:
+    """单次刷新的性能分析会话（cProfile + tracemalloc）.
+
+    cProfile 与 tracemalloc 仅在同步阶段内通过 enabled() 开启，不能跨越 await，
+    否则会统计到事件循环上的其他任务。
+    """
+
+    def __init__(self):
+        """初始化分析会话."""
+        self._profiler = cProfile.Profile()
+        self._memory: dict[str, dict[str, int]] = {}
+        self._snapshots: list[tracemalloc.Snapshot] = []
+        self._memory_skipped = False
+
+    @contextmanager
+    def enabled(self, stage: str):
+        """在同步代码块内启用 cProfile 与 tracemalloc，可多次进入并累计统计."""
+        # 其他组件已开启 tracemalloc 时不干扰其状态，跳过内存统计
+        trace_memory = not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        else:
+            self._memory_skipped = True
+        try:
+            self._profiler.enable()
+            profiling = True
+        except ValueError:
+            # Python 3.12+ 中其他分析工具已在运行，跳过本阶段，不影响刷新
+            _LOGGER.debug("其他分析工具正在运行，跳过 cProfile")
+            profiling = False
+        try:
+            yield
+        finally:
+            if profiling:
+                self._profiler.disable()
+            if trace_memory:
+                # 追踪仅覆盖本阶段，快照中只有本阶段未释放的分配，开销很小
+                _, peak = tracemalloc.get_traced_memory()
+                self._snapshots.append(tracemalloc.take_snapshot())
+                tracemalloc.stop()
+                stats = self._memory.setdefault(stage, {"count": 0, "peak": 0})
+                stats["count"] += 1
+                stats["peak"] = max(stats["peak"], peak)
+
+    def stop(self):
+        """结束会话，允许启动新的会话（在事件循环中调用）."""
+        global _active_session
+        if _active_session is self:
+            _active_session = None
+
+    def build_report(self) -> str:
+        """生成文本报告（在执行器线程中调用）."""
+        stream = io.StringIO()
+        stream.write("== cProfile（JSON 解析、数据处理、状态写入等同步阶段，按累计耗时排序）==\n")
+        try:
+            stats = pstats.Stats(self._profiler, stream=stream)
+        except TypeError:
+            # 本次刷新没有采集到任何调用
+            stream.write("无数据\n")
+        else:
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_FUNCTIONS)
+
+        stream.write("\n== tracemalloc（仅统计上述同步阶段内的内存分配）==\n")
+        if self._memory_skipped:
+            stream.write("tracemalloc 已被其他组件开启，部分阶段未统计内存\n")
+        stream.write("各阶段峰值（含已释放的临时分配）:\n")
+        for stage, memory in self._memory.items():
+            stream.write(f"  {stage}: 次数 {memory['count']}, 峰值 {memory['peak'] / 1024:.1f} KiB\n")
+
+        # 汇总各阶段结束时仍未释放的分配
+        totals: dict[tracemalloc.Traceback, list[int]] = {}
+        for snapshot in self._snapshots:
+            for stat in snapshot.statistics("lineno"):
+                total = totals.setdefault(stat.traceback, [0, 0])
+                total[0] += stat.size
+                total[1] += stat.count
+        stream.write("阶段结束时仍未释放的分配（按行汇总）:\n")
+        top = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+        for traceback, (size, count) in top[:PROFILE_TOP_ALLOCATIONS]:
+            stream.write(f"  {traceback}: size={size / 1024:.1f} KiB, count={count}\n")
+
+        return stream.getvalue()
+
+
+def profile_context(session: ProfileSession | None, stage: str):
+    """返回分析上下文；无会话时不做任何事."""
+    if session is None:
+        return nullcontext()
+    return session.enabled(stage)
+
+
+def start_profile_session() -> ProfileSession | None:
+    """启动分析会话；已有会话进行中时返回 None."""
+    global _active_session
+    if _active_session is not None:
+        return None
+    _active_session = ProfileSession()
+    return _active_session
+
+
+def save_profile_report(session: ProfileSession, path: str) -> bool:
+    """生成并写入分析报告（在执行器线程中调用），返回是否成功."""
+    report = session.build_report()
+    try:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(report)
+    except OSError as err:
+        _LOGGER.error("保存性能分析报告失败 %s: %s", path, err)
+        return False
+    _LOGGER.info("性能分析报告已保存: %s", path)
+    return True
@@ -7,7 +7,7 @@ from typing import Any
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
@@ -17,6 +17,7 @@ from homeassistant.helpers.event import async_track_time_change  # 新增导入
 from homeassistant.util import dt as dt_util
 
 from .const import DOMAIN
+from .profiling import profile_context, save_profile_report, start_profile_session
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,10 +28,11 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """设置传感器平台."""
-    api = hass.data[DOMAIN][entry.entry_id]["api"]
+    entry_data = hass.data[DOMAIN][entry.entry_id]
     
-    coordinator = PutianWaterCoordinator(hass, api)
+    coordinator = PutianWaterCoordinator(hass, entry_data["api"], entry_data["timer"], entry.entry_id)
     await coordinator.async_config_entry_first_refresh()
+    entry_data["coordinator"] = coordinator
 
     sensors = [
         PutianWaterBalanceSensor(coordinator, entry),
@@ -44,7 +46,7 @@ async def async_setup_entry(
 class PutianWaterCoordinator(DataUpdateCoordinator):
     """莆田水费数据协调器."""
     
-    def __init__(self, hass: HomeAssistant, api):
+    def __init__(self, hass: HomeAssistant, api, timer, entry_id):
         """初始化协调器."""
         super().__init__(
             hass,
@@ -54,6 +56,12 @@ class PutianWaterCoordinator(DataUpdateCoordinator):
         )
         self.api = api
         self.hass = hass
+        self.timer = timer
+        self._entry_id = entry_id
+        # 性能分析状态
+        self._profile_remaining = 0
+        self._profile_session = None
+        self.last_profile_report = None
         # 设置每天00:00的定时更新
         self._setup_daily_update()
     
@@ -73,32 +81,91 @@ class PutianWaterCoordinator(DataUpdateCoordinator):
             self.hass, async_daily_update, hour=0, minute=0, second=0
         )
     
+    def arm_profile(self, count: int):
+        """对接下来的 count 次刷新进行性能分析."""
+        self._profile_remaining = count
+    
+    def _start_profile(self):
+        """开始本次刷新的性能分析（其他会话进行中时顺延到之后的刷新）."""
+        if self._profile_remaining <= 0:
+            return
+        session = start_profile_session()
+        if session is None:
+            _LOGGER.debug("已有性能分析进行中，顺延到下次刷新")
+            return
+        self._profile_remaining -= 1
+        self._profile_session = session
+        self.api.profile_session = session
+    
+    def _finish_profile(self):
+        """结束性能分析，在执行器中生成报告并保存到配置目录."""
+        session, self._profile_session = self._profile_session, None
+        if session is None:
+            return
+        self.api.profile_session = None
+        session.stop()
+        filename = f"putian_water_profile_{self._entry_id}_{dt_util.now():%Y%m%d_%H%M%S}.txt"
+        self.hass.async_create_task(self._async_save_profile(session, self.hass.config.path(filename)))
+    
+    async def _async_save_profile(self, session, path):
+        """保存分析报告，成功后才记录报告路径."""
+        if await self.hass.async_add_executor_job(save_profile_report, session, path):
+            self.last_profile_report = path
+    
     async def _async_update_data(self):
         """获取最新数据."""
-        try:
-            balance_data = await self.api.get_user_meter_list()
-            bill_data = await self.api.get_payment_info()
-            
-            # 使用正确的方法获取当前时间
-            current_time = dt_util.now()
-            
-            return {
-                "balance": self._process_balance_data(balance_data),
-                "bill": self._process_bill_data(bill_data),
-                "query_year": self.api._query_year,
-                "last_update": current_time
-            }
-        except Exception as ex:
-            _LOGGER.error("更新水费数据失败: %s", ex)
-            # 返回空数据而不是抛出异常，避免传感器不可用
-            current_time = dt_util.now()
-            return {
-                "balance": {},
-                "bill": {},
-                "query_year": self.api._query_year,
-                "last_update": current_time,
-                "error": str(ex)
-            }
+        # 上次分析未经过实体更新就结束时，先保存其报告
+        self._finish_profile()
+        self._start_profile()
+        
+        with self.timer.time("update_data"):
+            try:
+                with self.timer.time("fetch_balance"):
+                    balance_data = await self.api.get_user_meter_list()
+                with self.timer.time("fetch_bill"):
+                    bill_data = await self.api.get_payment_info()
+                
+                # 使用正确的方法获取当前时间
+                current_time = dt_util.now()
+                
+                # 仅在同步阶段开启 cProfile，避免统计到等待网络时的其他任务
+                with self.timer.time("process_balance"), profile_context(self._profile_session, "process_balance"):
+                    balance = self._process_balance_data(balance_data)
+                with self.timer.time("process_bill"), profile_context(self._profile_session, "process_bill"):
+                    bill = self._process_bill_data(bill_data)
+                
+                return {
+                    "balance": balance,
+                    "bill": bill,
+                    "query_year": self._format_query_years(bill_data.get("years")),
+                    "last_update": current_time
+                }
+            except Exception as ex:
+                _LOGGER.error("更新水费数据失败: %s", ex)
+                # 返回空数据而不是抛出异常，避免传感器不可用
+                current_time = dt_util.now()
+                return {
+                    "balance": {},
+                    "bill": {},
+                    "query_year": self._format_query_years(self.api.get_query_years()),
+                    "last_update": current_time,
+                    "error": str(ex)
+                }
+    
+    @callback
+    def async_update_listeners(self) -> None:
+        """通知实体更新，并统计状态写入耗时."""
+        with self.timer.time("state_write"), profile_context(self._profile_session, "state_write"):
+            super().async_update_listeners()
+        # 状态写入是刷新的最后一步，在此结束性能分析
+        self._finish_profile()
+    
+    @staticmethod
+    def _format_query_years(years):
+        """格式化查询年份，如：2025 或 2024-2025."""
+        if not years:
+            return ""
+        return "-".join(str(year) for year in sorted({min(years), max(years)}))
     
     def _process_balance_data(self, data):
         """处理余额数据."""
@@ -174,6 +241,16 @@ class PutianWaterSensor(CoordinatorEntity, SensorEntity):
             "model": "水费查询设备",
             "configuration_url": "https://wt.ptswater.cn",
         }
+    
+    @property
+    def extra_state_attributes(self):
+        """返回传感器属性，并统计属性构建耗时."""
+        with self.coordinator.timer.time("build_attributes"):
+            return self._build_attributes()
+    
+    def _build_attributes(self):
+        """构建传感器属性."""
+        return None
 
 
 class PutianWaterBalanceSensor(PutianWaterSensor):
@@ -196,9 +273,8 @@ class PutianWaterBalanceSensor(PutianWaterSensor):
             return self.coordinator.data["balance"]["account"]["balance"]
         return None
     
-    @property
-    def extra_state_attributes(self):
-        """返回传感器属性."""
+    def _build_attributes(self):
+        """构建传感器属性."""
         if (not self.coordinator.data or 
             "balance" not in self.coordinator.data or 
             not self.coordinator.data["balance"]):
@@ -255,9 +331,8 @@ class PutianWaterLastBillSensor(PutianWaterSensor):
             return self.coordinator.data["bill"]["payment"]["amount"]
         return None
     
-    @property
-    def extra_state_attributes(self):
-        """返回传感器属性."""
+    def _build_attributes(self):
+        """构建传感器属性."""
         if (not self.coordinator.data or 
             "bill" not in self.coordinator.data or 
             not self.coordinator.data["bill"]):
@@ -334,9 +409,8 @@ class PutianWaterUpdateTimeSensor(PutianWaterSensor):
                     pass
         return None
     
-    @property
-    def extra_state_attributes(self):
-        """返回传感器属性."""
+    def _build_attributes(self):
+        """构建传感器属性."""
         attrs = {
             "query_year": self.coordinator.data.get("query_year", "") if self.coordinator.data else "",
             "update_schedule": "每天00:00自动更新",  # 显示更新计划